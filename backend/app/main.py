@@ -1,15 +1,61 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from brotli_asgi import BrotliMiddleware
+from fastapi.responses import ORJSONResponse, Response
 import os
-import psycopg2
-import psycopg2.extras
+import re
+import asyncio
+import contextlib
+import hashlib
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+import asyncpg
+import orjson
 from dotenv import load_dotenv
+from fastapi_cache import FastAPICache
+from fastapi_cache.coder import Coder
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.decorator import cache
+from fastapi_cache.types import Backend
+from redis import asyncio as aioredis
 
 # Force load backend/.env
 ENV_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env")
 load_dotenv(ENV_PATH)
 
-app = FastAPI()
+log = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class DBConfig:
+    host: str
+    port: int
+    dbname: str
+    user: str
+    password: str
+    # Set to 0 behind PgBouncer in transaction mode: server-side prepared
+    # statements don't survive a backend switch between transactions.
+    statement_cache_size: int
+    # LISTEN needs a session-level connection, so the invalidation listener talks
+    # to Postgres directly when the pool goes through PgBouncer.
+    listen_host: str
+    listen_port: int
+
+# Read once at import; nothing on the request path touches os.environ.
+DB_CFG = DBConfig(
+    host=os.getenv("DB_HOST"),
+    port=int(os.getenv("DB_PORT", "5432")),
+    dbname=os.getenv("DB_NAME"),
+    user=os.getenv("DB_USER"),
+    password=os.getenv("DB_PASSWORD"),
+    statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100")),
+    listen_host=os.getenv("DB_LISTEN_HOST", os.getenv("DB_HOST")),
+    listen_port=int(os.getenv("DB_LISTEN_PORT", os.getenv("DB_PORT", "5432"))),
+)
+DB_SCHEMA_DEFAULT = os.getenv("DB_SCHEMA", "public")  # change to mes_dashboards if needed
+
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,100 +65,266 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def get_conn():
-    return psycopg2.connect(
-        host=os.getenv("DB_HOST"),
-        port=int(os.getenv("DB_PORT", "5432")),
-        dbname=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        connect_timeout=5,
+# br for clients that accept it, gzip otherwise; small payloads are left alone.
+app.add_middleware(BrotliMiddleware, quality=4, minimum_size=1024, gzip_fallback=True)
+
+@app.on_event("startup")
+async def open_pool():
+    # One process-wide asyncpg pool; handlers await it instead of tying up threads.
+    app.state.pool = await asyncpg.create_pool(
+        host=DB_CFG.host,
+        port=DB_CFG.port,
+        database=DB_CFG.dbname,
+        user=DB_CFG.user,
+        password=DB_CFG.password,
+        timeout=5,
+        min_size=2,
+        max_size=20,
+        command_timeout=10,
+        statement_cache_size=DB_CFG.statement_cache_size,
     )
 
-@app.get("/test-db")
-def test_db():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM public.raw_parts;")
-    count = cur.fetchone()[0]
-    cur.close()
-    conn.close()
-    return {"raw_parts_count": count}
+def cache_key(func, namespace="", *, request=None, response=None, args=(), kwargs=None):
+    """
+    One cache entry per (path, query params) so e.g. different schema/stage/limit
+    combos never collide.
+    """
+    path = request.url.path if request is not None else func.__name__
+    raw = repr((path, sorted((kwargs or {}).items())))
+    return f"{namespace}:{hashlib.md5(raw.encode()).hexdigest()}"
 
-@app.get("/kpis")
-def kpis():
+class RawJSONCoder(Coder):
     """
-    Edit these queries to match your schemas/tables if not in public.
+    Caches the exact JSON bytes a handler produced and replays them as-is,
+    so cache hits skip both decoding and re-serialization. Cached handlers
+    must return a Response.
     """
-    try:
-        conn = get_conn()
-        cur = conn.cursor()
+    @classmethod
+    def encode(cls, value):
+        if not isinstance(value, Response):
+            raise TypeError(f"RawJSONCoder caches Response objects, got {type(value).__name__}")
+        return value.body
+
+    @classmethod
+    def decode(cls, value):
+        return Response(content=value, media_type="application/json")
+
+    @classmethod
+    def decode_as_type(cls, value, *, type_=None):
+        return cls.decode(value)
+
+# Cached responses are dropped by table-change notifications (see
+# sql/002_cache_invalidation.sql). CACHE_TTL is only used while the listener is
+# connected and the triggers exist; otherwise entries get CACHE_FALLBACK_TTL, so
+# a dropped listener or missing triggers can't leave the UI minutes behind.
+CACHE_TTL = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_FALLBACK_TTL = int(os.getenv("CACHE_FALLBACK_TTL_SECONDS", "30"))
+INVALIDATE_CHANNEL = "mes_invalidate"
+INVALIDATE_TABLES = (
+    "raw_parts", "raw_robot_cycles", "raw_inspection",
+    "raw_conveyor", "raw_bin_events", "raw_shipments",
+)
+# Namespaces that aggregate over every raw table, cleared on any change.
+AGGREGATE_NAMESPACES = ("kpis", "dashboard")
+# Notifications arriving this close together are cleared in one batch.
+INVALIDATE_DEBOUNCE_SECONDS = 0.1
+LISTENER_RETRY_SECONDS = 5
+LISTENER_PING_SECONDS = 30
+# How often to look again when an optional sql/ bootstrap (the 002 triggers,
+# the 003 view) is missing or unusable.
+BOOTSTRAP_RECHECK_SECONDS = 60
+
+class InvalidationAwareBackend(Backend):
+    """
+    Wraps the real cache backend and caps every entry at CACHE_FALLBACK_TTL
+    unless change notifications are currently being received.
+    """
+    def __init__(self, backend: Backend):
+        self.backend = backend
+
+    async def get_with_ttl(self, key):
+        return await self.backend.get_with_ttl(key)
+
+    async def get(self, key):
+        return await self.backend.get(key)
+
+    async def set(self, key, value, expire=None):
+        if not app.state.invalidation_live:
+            expire = min(expire or CACHE_FALLBACK_TTL, CACHE_FALLBACK_TTL)
+        await self.backend.set(key, value, expire)
+
+    async def clear(self, namespace=None, key=None):
+        return await self.backend.clear(namespace, key)
+
+@app.on_event("startup")
+async def init_cache():
+    # Falls back to a per-process in-memory cache when REDIS_URL is not set (local dev).
+    redis_url = os.getenv("REDIS_URL")
+    app.state.redis = aioredis.from_url(redis_url) if redis_url else None
+    app.state.invalidation_live = False
+    backend = RedisBackend(app.state.redis) if app.state.redis else InMemoryBackend()
+    FastAPICache.init(
+        InvalidationAwareBackend(backend), prefix="mes", key_builder=cache_key, coder=RawJSONCoder
+    )
 
-        # Example KPI 1: queued parts
-        cur.execute("SELECT COUNT(*) FROM public.raw_parts WHERE stage = 'queued';")
-        queued = cur.fetchone()[0]
+_pending_invalidations = set()
+_flush_task = None
 
-        # Example KPI 2: total parts
-        cur.execute("SELECT COUNT(*) FROM public.raw_parts;")
-        total_parts = cur.fetchone()[0]
+def on_table_change(connection, pid, channel, payload):
+    global _flush_task
+    _pending_invalidations.add(payload)
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.create_task(flush_invalidations())
 
-        # Example KPI 3: newest part timestamp (if created_at exists)
-        newest_ts = None
+async def claim_invalidation(payload: str) -> bool:
+    """
+    Payloads are "<table>:<txid>" and every worker receives each one. With a
+    shared Redis only the first worker to claim it clears the cache; the rest
+    skip. In-process caches are per worker, so each one clears its own.
+    """
+    if app.state.redis is None or ":" not in payload:
+        return True
+    return bool(await app.state.redis.set(f"mes-invalidated:{payload}", 1, nx=True, ex=60))
+
+async def flush_invalidations():
+    while _pending_invalidations:
+        await asyncio.sleep(INVALIDATE_DEBOUNCE_SECONDS)
+        payloads = list(_pending_invalidations)
+        _pending_invalidations.clear()
         try:
-            cur.execute("SELECT MAX(created_at) FROM public.raw_parts;")
-            newest_ts = cur.fetchone()[0]
+            tables = {p.partition(":")[0] for p in payloads if await claim_invalidation(p)}
+            if tables:
+                for namespace in (*tables, *AGGREGATE_NAMESPACES):
+                    await FastAPICache.clear(namespace=namespace)
         except Exception:
-            newest_ts = None
-
-        cur.close()
-        conn.close()
+            log.warning("Cache invalidation failed for %s", payloads, exc_info=True)
 
-        return {
-            "queued_parts": int(queued),
-            "total_parts": int(total_parts),
-            "newest_created_at": str(newest_ts) if newest_ts else None,
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def triggers_installed(con) -> bool:
+    count = await con.fetchval(
+        """
+        SELECT COUNT(*)
+        FROM pg_trigger t
+        JOIN pg_class c ON c.oid = t.tgrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = $1 AND c.relname = ANY($2::text[]) AND t.tgname = c.relname || '_chg'
+        """,
+        DB_SCHEMA_DEFAULT,
+        list(INVALIDATE_TABLES),
+    )
+    return count == len(INVALIDATE_TABLES)
 
-@app.get("/queue")
-def queue(
-    stage: str = Query(default="queued"),
-    limit: int = Query(default=200, ge=1, le=500),
-):
+async def listen_for_changes():
     """
-    Returns a clean table for the UI.
-    Adjust selected columns to match your raw_parts schema.
+    Keeps a LISTEN session open, reconnecting whenever it drops. Dedicated
+    connection: it has to stay open, so it must not hold one of the pool's.
+    Triggers are only checked in DB_SCHEMA_DEFAULT; other schemas need
+    002_cache_invalidation.sql applied too.
     """
-    try:
-        conn = get_conn()
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        # If your table uses different column names, edit here.
-        sql = """
-        SELECT
-          part_id,
-          stage,
-          created_at,
-          source_robot,
-          source_pi,
-          target_ned
-        FROM public.raw_parts
-        WHERE (%s = '' OR stage = %s)
-        ORDER BY created_at DESC
-        LIMIT %s;
-        """
-        cur.execute(sql, (stage, stage, limit))
-        rows = cur.fetchall()
+    while True:
+        retry = LISTENER_RETRY_SECONDS
+        con = None
+        try:
+            con = await asyncpg.connect(
+                host=DB_CFG.listen_host,
+                port=DB_CFG.listen_port,
+                database=DB_CFG.dbname,
+                user=DB_CFG.user,
+                password=DB_CFG.password,
+                timeout=5,
+            )
+            if not await triggers_installed(con):
+                log.warning(
+                    "Cache-invalidation triggers missing in schema %s; caching for %ss only",
+                    DB_SCHEMA_DEFAULT, CACHE_FALLBACK_TTL,
+                )
+                retry = BOOTSTRAP_RECHECK_SECONDS
+            else:
+                lost = asyncio.Event()
+                # Bound now: a late callback from an old connection must not
+                # set the next session's event.
+                con.add_termination_listener(lambda _, lost=lost: lost.set())
+                await con.add_listener(INVALIDATE_CHANNEL, on_table_change)
+                # Changes made while nobody was listening were never announced.
+                await FastAPICache.clear()
+                app.state.invalidation_live = True
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), LISTENER_PING_SECONDS)
+                    except asyncio.TimeoutError:
+                        # Catches half-open sockets that never report termination.
+                        await con.fetchval("SELECT 1", timeout=5)
+                log.warning("Cache-invalidation listener lost its connection; reconnecting")
+        except asyncio.CancelledError:
+            app.state.invalidation_live = False
+            if con is not None:
+                con.terminate()
+            raise
+        except Exception:
+            log.warning("Cache-invalidation listener failed; reconnecting", exc_info=True)
+        if app.state.invalidation_live:
+            app.state.invalidation_live = False
+            # Entries cached with the long TTL can't be trusted any more.
+            try:
+                await FastAPICache.clear()
+            except Exception:
+                log.warning("Could not clear the response cache", exc_info=True)
+        if con is not None and not con.is_closed():
+            con.terminate()
+        await asyncio.sleep(retry)
+
+@app.on_event("startup")
+async def start_listener():
+    app.state.listener_task = asyncio.create_task(listen_for_changes())
+
+@app.on_event("shutdown")
+async def stop_listener():
+    app.state.listener_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await app.state.listener_task
+
+_IDENT_RE = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+
+def quote_ident(name: str) -> str:
+    # Same quoting as Postgres quote_ident(): embedded quotes are doubled.
+    return '"' + name.replace('"', '""') + '"'
+
+@lru_cache(maxsize=64)
+def table_sql(schema: str, table: str) -> str:
+    return f"SELECT * FROM {quote_ident(schema)}.{quote_ident(table)} LIMIT $1"
+
+async def fetch_one(sql: str, *params):
+    # Only single-row reads (e.g. /kpis) come through here; row sets go through
+    # fetch_json_rows so no per-row dicts are ever built in Python.
+    async with app.state.pool.acquire() as con:
+        row = await con.fetchrow(sql, *params)
+    return dict(row) if row is not None else None
+
+def json_rows(sql: str) -> str:
+    # t.*, not bare t: a column named t would win over the alias and json_agg
+    # would collect that column instead of whole rows.
+    return f"(SELECT COALESCE(json_agg(t.*), '[]'::json) FROM ({sql}) t)"
+
+@lru_cache(maxsize=64)
+def rows_json_sql(sql: str) -> str:
+    return f"SELECT json_build_object('rows', {json_rows(sql)})"
+
+async def fetch_json_rows(sql: str, *params):
+    """
+    Has Postgres render the {"rows": [...]} document itself (json_agg), so big
+    list endpoints forward one text blob instead of building dicts per row.
+    """
+    async with app.state.pool.acquire() as con:
+        body = await con.fetchval(rows_json_sql(sql), *params)
+    return Response(content=body, media_type="application/json")
 
-        cur.close()
-        conn.close()
-        return {"rows": rows}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/test-db")
+async def test_db():
+    async with app.state.pool.acquire() as con:
+        count = await con.fetchval("SELECT COUNT(*) FROM public.raw_parts;")
+    return {"raw_parts_count": count}
 
 @app.get("/table-sample")
-def table_sample(
+async def table_sample(
     table: str = Query(..., description="Table name, e.g. raw_parts"),
     schema: str = Query(default="public"),
     limit: int = Query(default=50, ge=1, le=200),
@@ -122,66 +334,228 @@ def table_sample(
     - restricts schema/table chars
     - uses LIMIT
     """
-    import re
-    if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", table):
+    if not _IDENT_RE.match(table):
         raise HTTPException(status_code=400, detail="Invalid table name")
-    if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", schema):
+    if not _IDENT_RE.match(schema):
         raise HTTPException(status_code=400, detail="Invalid schema name")
 
     try:
-        conn = get_conn()
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute(f'SELECT * FROM "{schema}"."{table}" LIMIT %s;', (limit,))
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return {"rows": rows}
+        return await fetch_json_rows(table_sql(schema, table), limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    from fastapi import FastAPI, HTTPException, Query
 
-DB_SCHEMA_DEFAULT = os.getenv("DB_SCHEMA", "public")  # change to mes_dashboards if needed
+def alerts_sql(worst: str) -> str:
+    return """
+    WITH latest AS (
+      SELECT id, conveyor_id, part_id, source_pi, duration_sec, speed, event_time
+      FROM {schema}.raw_conveyor
+      WHERE event_time IS NOT NULL
+      ORDER BY event_time DESC
+      LIMIT 1
+    ),
+    worst AS (""" + worst + """)
+    SELECT
+      (SELECT row_to_json(latest) FROM latest) AS latest,
+      -- newest row's event_time is MAX(event_time): no second pass over the table
+      (SELECT EXTRACT(EPOCH FROM (NOW() - event_time)) FROM latest) AS seconds_stale,
+      -- also as timestamptz: the UI shows str(datetime), not row_to_json's ISO form
+      (SELECT event_time FROM latest) AS latest_event_time,
+      (SELECT row_to_json(worst) FROM worst) AS worst
+    """
 
-def get_conn():
-    return psycopg2.connect(
-        host=os.getenv("DB_HOST"),
-        port=int(os.getenv("DB_PORT", "5432")),
-        dbname=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        connect_timeout=5,
+# Endpoint SQL with the (quoted) schema as the only substitution. stmt() renders
+# each (endpoint, schema) pair once, so every call sends byte-identical text and
+# asyncpg's per-connection statement cache reuses the prepared plan instead of
+# Postgres re-parsing/planning it.
+SQL = {
+    "kpis": """
+    SELECT
+      (SELECT COUNT(*) FROM {schema}.raw_parts WHERE stage='queued') AS queued_parts,
+      (SELECT COUNT(*) FROM {schema}.raw_parts) AS total_parts,
+      (SELECT COUNT(*) FROM {schema}.raw_robot_cycles) AS robot_cycles,
+      (SELECT COUNT(*) FROM {schema}.raw_inspection) AS inspections,
+      (SELECT COUNT(*) FROM {schema}.raw_conveyor) AS conveyor_events,
+      (SELECT COUNT(*) FROM {schema}.raw_bin_events) AS bin_events,
+      (SELECT COUNT(*) FROM {schema}.raw_shipments) AS shipments,
+      (SELECT MAX(created_at) FROM {schema}.raw_parts) AS newest_created_at
+    """,
+    # Two statements rather than "($2 = '' OR stage = $2)": each gets its own
+    # plan and can use the (stage, created_at) / (created_at) indexes.
+    "queue_all": """
+    SELECT
+      part_id,
+      stage,
+      created_at,
+      source_robot,
+      source_pi,
+      target_ned
+    FROM {schema}.raw_parts
+    ORDER BY created_at DESC
+    LIMIT $1
+    """,
+    "queue_stage": """
+    SELECT
+      part_id,
+      stage,
+      created_at,
+      source_robot,
+      source_pi,
+      target_ned
+    FROM {schema}.raw_parts
+    WHERE stage = $2
+    ORDER BY created_at DESC
+    LIMIT $1
+    """,
+    "robot_cycles": 'SELECT * FROM {schema}.raw_robot_cycles ORDER BY 1 DESC LIMIT $1',
+    "inspection": 'SELECT * FROM {schema}.raw_inspection ORDER BY 1 DESC LIMIT $1',
+    "conveyor": 'SELECT * FROM {schema}.raw_conveyor ORDER BY 1 DESC LIMIT $1',
+    "bin_events": 'SELECT * FROM {schema}.raw_bin_events ORDER BY 1 DESC LIMIT $1',
+    "shipments": 'SELECT * FROM {schema}.raw_shipments ORDER BY 1 DESC LIMIT $1',
+    "alerts": alerts_sql("""
+      SELECT
+        conveyor_id,
+        source_pi,
+        AVG(duration_sec) AS avg_duration,
+        COUNT(*) AS n
+      FROM {schema}.raw_conveyor
+      WHERE event_time >= NOW() - make_interval(mins => $1)
+      GROUP BY conveyor_id, source_pi
+      HAVING COUNT(*) >= 5
+      ORDER BY AVG(duration_sec) DESC
+      LIMIT 1
+    """),
+    # Same alerts, with the window aggregate read from the background-refreshed
+    # mv_conveyor_window (sql/003_conveyor_window_mv.sql). Its window is fixed at
+    # CONVEYOR_MV_WINDOW_MINUTES, hence no $1.
+    "alerts_mv": alerts_sql("""
+      SELECT conveyor_id, source_pi, avg_duration, n
+      FROM {schema}.mv_conveyor_window
+      WHERE n >= 5
+      ORDER BY avg_duration DESC
+      LIMIT 1
+    """),
+}
+
+# /dashboard: every section the UI polls, rendered by Postgres as one JSON
+# document. All list templates take the row limit as $1 (queue_stage adds stage
+# as $2), so they nest into a single statement unchanged.
+DASHBOARD_LISTS = ("robot_cycles", "inspection", "conveyor", "bin_events", "shipments")
+
+def dashboard_sql(queue: str) -> str:
+    sections = [("queue", SQL[queue])] + [(name, SQL[name]) for name in DASHBOARD_LISTS]
+    return (
+        "SELECT json_build_object(\n"
+        f"  'kpis', (SELECT row_to_json(k.*) FROM ({SQL['kpis']}) k),\n"
+        + ",\n".join(f"  '{name}', {json_rows(sql)}" for name, sql in sections)
+        + "\n)"
     )
 
-def fetch_dict_rows(sql: str, params=()):
-    conn = get_conn()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute(sql, params)
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+SQL["dashboard_all"] = dashboard_sql("queue_all")
+SQL["dashboard_stage"] = dashboard_sql("queue_stage")
+
+@lru_cache(maxsize=64)
+def stmt(name: str, schema: str) -> str:
+    return SQL[name].format(schema=quote_ident(schema))
+
+@app.on_event("startup")
+def warm_statements():
+    for name in SQL:
+        stmt(name, DB_SCHEMA_DEFAULT)
+
+# Must match the interval in sql/003_conveyor_window_mv.sql.
+CONVEYOR_MV_WINDOW_MINUTES = 2
+CONVEYOR_MV_REFRESH_SECONDS = 5
+# Any fixed key works; it just keeps several workers from refreshing at once.
+CONVEYOR_MV_LOCK_KEY = 0x4D45535F4D56
+# Errors only a schema change fixes: view or log table missing, no privilege on
+# them, or the view can't be refreshed concurrently (unique index missing).
+CONVEYOR_MV_PERMANENT_ERRORS = (
+    asyncpg.UndefinedTableError,
+    asyncpg.InsufficientPrivilegeError,
+    asyncpg.ObjectNotInPrerequisiteStateError,
+)
+
+async def refresh_conveyor_window():
+    """
+    Keeps mv_conveyor_window current for /alerts. Every worker runs this, but
+    the refresh itself happens at most once per CONVEYOR_MV_REFRESH_SECONDS
+    across all of them: mv_refresh_log records when it last ran. While the
+    view can't be used in DB_SCHEMA_DEFAULT, /alerts keeps using the live
+    query and this checks again every BOOTSTRAP_RECHECK_SECONDS.
+    """
+    schema = quote_ident(DB_SCHEMA_DEFAULT)
+    fresh_sql = f"""
+        SELECT refreshed_at > NOW() - make_interval(secs => $1)
+        FROM {schema}.mv_refresh_log
+        WHERE view_name = 'mv_conveyor_window'
+    """
+    refresh_sql = f"REFRESH MATERIALIZED VIEW CONCURRENTLY {schema}.mv_conveyor_window"
+    log_sql = f"""
+        INSERT INTO {schema}.mv_refresh_log (view_name, refreshed_at)
+        VALUES ('mv_conveyor_window', NOW())
+        ON CONFLICT (view_name) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+    """
+    unavailable = False
+    while True:
+        delay = CONVEYOR_MV_REFRESH_SECONDS
+        try:
+            async with app.state.pool.acquire() as con:
+                async with con.transaction():
+                    if (
+                        await con.fetchval("SELECT pg_try_advisory_xact_lock($1)", CONVEYOR_MV_LOCK_KEY)
+                        and not await con.fetchval(fresh_sql, CONVEYOR_MV_REFRESH_SECONDS)
+                    ):
+                        await con.execute(refresh_sql)
+                        await con.execute(log_sql)
+            if unavailable:
+                log.info("mv_conveyor_window available again; /alerts uses it")
+                unavailable = False
+            app.state.conveyor_mv = True
+        except CONVEYOR_MV_PERMANENT_ERRORS as e:
+            if not unavailable:
+                log.warning("mv_conveyor_window unusable, /alerts will query raw_conveyor live: %s", e)
+                unavailable = True
+            app.state.conveyor_mv = False
+            delay = BOOTSTRAP_RECHECK_SECONDS
+        except Exception:
+            # Transient DB trouble: keep serving /alerts live until a refresh succeeds.
+            log.warning("mv_conveyor_window refresh failed; retrying", exc_info=True)
+            app.state.conveyor_mv = False
+        await asyncio.sleep(delay)
+
+@app.on_event("startup")
+async def start_conveyor_window_refresh():
+    app.state.conveyor_mv = False
+    app.state.conveyor_mv_task = asyncio.create_task(refresh_conveyor_window())
+
+@app.on_event("shutdown")
+async def stop_conveyor_window_refresh():
+    app.state.conveyor_mv_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await app.state.conveyor_mv_task
+
+# Registered after every hook that uses the pool, so it is closed last.
+@app.on_event("shutdown")
+async def close_pool():
+    await app.state.pool.close()
 
 @app.get("/kpis")
-def kpis(schema: str = Query(default=DB_SCHEMA_DEFAULT)):
+@cache(expire=CACHE_TTL, namespace="kpis")
+async def kpis(schema: str = Query(default=DB_SCHEMA_DEFAULT)):
+    """
+    All KPI aggregates in one statement -> one DB round-trip.
+    """
     try:
-        rows = fetch_dict_rows(
-            f"""
-            SELECT
-              (SELECT COUNT(*) FROM "{schema}".raw_parts WHERE stage='queued') AS queued_parts,
-              (SELECT COUNT(*) FROM "{schema}".raw_parts) AS total_parts,
-              (SELECT COUNT(*) FROM "{schema}".raw_robot_cycles) AS robot_cycles,
-              (SELECT COUNT(*) FROM "{schema}".raw_inspection) AS inspections,
-              (SELECT COUNT(*) FROM "{schema}".raw_conveyor) AS conveyor_events,
-              (SELECT COUNT(*) FROM "{schema}".raw_bin_events) AS bin_events,
-              (SELECT COUNT(*) FROM "{schema}".raw_shipments) AS shipments
-            """
-        )
-        return rows[0] if rows else {}
+        row = await fetch_one(stmt("kpis", schema))
+        # Returned as a response object so FastAPI skips jsonable_encoder; orjson
+        # writes newest_created_at (a datetime) as ISO-8601 itself.
+        return ORJSONResponse(row if row is not None else {})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/queue")
-def queue(
+@cache(expire=CACHE_TTL, namespace="raw_parts")
+async def queue(
     schema: str = Query(default=DB_SCHEMA_DEFAULT),
     stage: str = Query(default="queued"),
     limit: int = Query(default=200, ge=1, le=500),
@@ -191,99 +565,72 @@ def queue(
     If some columns don't exist, remove them.
     """
     try:
-        sql = f"""
-        SELECT
-          part_id,
-          stage,
-          created_at,
-          source_robot,
-          source_pi,
-          target_ned
-        FROM "{schema}".raw_parts
-        WHERE (%s = '' OR stage = %s)
-        ORDER BY created_at DESC
-        LIMIT %s
-        """
-        rows = fetch_dict_rows(sql, (stage, stage, limit))
-        return {"rows": rows}
+        if stage:
+            return await fetch_json_rows(stmt("queue_stage", schema), limit, stage)
+        return await fetch_json_rows(stmt("queue_all", schema), limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/robot-cycles")
-def robot_cycles(
+@cache(expire=CACHE_TTL, namespace="raw_robot_cycles")
+async def robot_cycles(
     schema: str = Query(default=DB_SCHEMA_DEFAULT),
     limit: int = Query(default=200, ge=1, le=1000),
 ):
     try:
-        rows = fetch_dict_rows(
-            f'SELECT * FROM "{schema}".raw_robot_cycles ORDER BY 1 DESC LIMIT %s',
-            (limit,),
-        )
-        return {"rows": rows}
+        return await fetch_json_rows(stmt("robot_cycles", schema), limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/inspection")
-def inspection(
+@cache(expire=CACHE_TTL, namespace="raw_inspection")
+async def inspection(
     schema: str = Query(default=DB_SCHEMA_DEFAULT),
     limit: int = Query(default=200, ge=1, le=1000),
 ):
     try:
-        rows = fetch_dict_rows(
-            f'SELECT * FROM "{schema}".raw_inspection ORDER BY 1 DESC LIMIT %s',
-            (limit,),
-        )
-        return {"rows": rows}
+        return await fetch_json_rows(stmt("inspection", schema), limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/conveyor")
-def conveyor(
+@cache(expire=CACHE_TTL, namespace="raw_conveyor")
+async def conveyor(
     schema: str = Query(default=DB_SCHEMA_DEFAULT),
     limit: int = Query(default=200, ge=1, le=1000),
 ):
     try:
-        rows = fetch_dict_rows(
-            f'SELECT * FROM "{schema}".raw_conveyor ORDER BY 1 DESC LIMIT %s',
-            (limit,),
-        )
-        return {"rows": rows}
+        return await fetch_json_rows(stmt("conveyor", schema), limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/bin-events")
-def bin_events(
+@cache(expire=CACHE_TTL, namespace="raw_bin_events")
+async def bin_events(
     schema: str = Query(default=DB_SCHEMA_DEFAULT),
     limit: int = Query(default=200, ge=1, le=1000),
 ):
     try:
-        rows = fetch_dict_rows(
-            f'SELECT * FROM "{schema}".raw_bin_events ORDER BY 1 DESC LIMIT %s',
-            (limit,),
-        )
-        return {"rows": rows}
+        return await fetch_json_rows(stmt("bin_events", schema), limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/shipments")
-def shipments(
+@cache(expire=CACHE_TTL, namespace="raw_shipments")
+async def shipments(
     schema: str = Query(default=DB_SCHEMA_DEFAULT),
     limit: int = Query(default=200, ge=1, le=1000),
 ):
     try:
-        rows = fetch_dict_rows(
-            f'SELECT * FROM "{schema}".raw_shipments ORDER BY 1 DESC LIMIT %s',
-            (limit,),
-        )
-        return {"rows": rows}
+        return await fetch_json_rows(stmt("shipments", schema), limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-from fastapi import Query
-import psycopg2.extras
-
+# Short TTL stays here: "conveyor stale" fires exactly when no rows arrive, so
+# there is no change notification to invalidate on.
 @app.get("/alerts")
-def alerts(
+@cache(expire=5, namespace="raw_conveyor")
+async def alerts(
     schema: str = Query(default=DB_SCHEMA_DEFAULT),
     conveyor_stale_seconds: int = Query(default=30),
     conveyor_slow_duration: float = Query(default=3.0),
@@ -294,31 +641,25 @@ def alerts(
     Includes identifiers (conveyor_id/part_id/source_pi) so UI can highlight & focus.
     """
     try:
-        conn = get_conn()
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
         active_alerts = []
 
-        # Latest conveyor row (for identifiers)
-        cur.execute(
-            f"""
-            SELECT id, conveyor_id, part_id, source_pi, duration_sec, speed, event_time
-            FROM "{schema}".raw_conveyor
-            ORDER BY event_time DESC
-            LIMIT 1
-            """
-        )
-        latest = cur.fetchone()
+        # Latest conveyor row (for identifiers), staleness and the "worst"
+        # conveyor in the lookback window come from one statement, so there is
+        # nothing left to pipeline; the connection goes back to the pool before
+        # the alerts are assembled.
+        if (
+            app.state.conveyor_mv
+            and schema == DB_SCHEMA_DEFAULT
+            and window_minutes == CONVEYOR_MV_WINDOW_MINUTES
+        ):
+            row = await fetch_one(stmt("alerts_mv", schema))
+        else:
+            row = await fetch_one(stmt("alerts", schema), window_minutes)
+        latest = orjson.loads(row["latest"]) if row["latest"] else None
+        worst = orjson.loads(row["worst"]) if row["worst"] else None
+        seconds_stale = row["seconds_stale"]
 
         # 1) Conveyor stale (no recent events)
-        cur.execute(
-            f"""
-            SELECT EXTRACT(EPOCH FROM (NOW() - MAX(event_time))) AS seconds_stale
-            FROM "{schema}".raw_conveyor
-            """
-        )
-        seconds_stale = cur.fetchone()["seconds_stale"]
-
         if seconds_stale is None:
             # no rows at all
             active_alerts.append({
@@ -342,7 +683,7 @@ def alerts(
                     "title": "Conveyor events stopped",
                     "message": f"No conveyor events in the last {int(seconds_stale)} seconds.",
                     "source": "raw_conveyor",
-                    "event_time": str(latest["event_time"]) if latest else None,
+                    "event_time": str(row["latest_event_time"]) if latest else None,
                     "conveyor_id": latest["conveyor_id"] if latest else None,
                     "part_id": latest["part_id"] if latest else None,
                     "source_pi": latest["source_pi"] if latest else None,
@@ -350,24 +691,7 @@ def alerts(
                     "threshold": float(conveyor_stale_seconds),
                 })
 
-        # 2) Conveyor slow: find "worst" conveyor in the lookback window
-        cur.execute(
-            f"""
-            SELECT
-              conveyor_id,
-              source_pi,
-              AVG(duration_sec) AS avg_duration,
-              COUNT(*) AS n
-            FROM "{schema}".raw_conveyor
-            WHERE event_time >= NOW() - (%s || ' minutes')::interval
-            GROUP BY conveyor_id, source_pi
-            HAVING COUNT(*) >= 5
-            ORDER BY AVG(duration_sec) DESC
-            LIMIT 1
-            """,
-            (window_minutes,)
-        )
-        worst = cur.fetchone()
+        # 2) Conveyor slow: "worst" conveyor in the lookback window
         if worst and worst["avg_duration"] is not None:
             avg_d = float(worst["avg_duration"])
             if avg_d > float(conveyor_slow_duration):
@@ -385,8 +709,27 @@ def alerts(
                     "threshold": float(conveyor_slow_duration),
                 })
 
-        cur.close()
-        conn.close()
-        return {"alerts": active_alerts, "count": len(active_alerts)}
+        return ORJSONResponse({"alerts": active_alerts, "count": len(active_alerts)})
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/dashboard")
+@cache(expire=CACHE_TTL, namespace="dashboard")
+async def dashboard(
+    schema: str = Query(default=DB_SCHEMA_DEFAULT),
+    stage: str = Query(default="queued"),
+    limit: int = Query(default=200, ge=1, le=500),
+):
+    """
+    KPIs + queue + every raw list in one request, one pool checkout and one
+    statement, instead of the UI firing seven requests in parallel.
+    """
+    try:
+        async with app.state.pool.acquire() as con:
+            if stage:
+                body = await con.fetchval(stmt("dashboard_stage", schema), limit, stage)
+            else:
+                body = await con.fetchval(stmt("dashboard_all", schema), limit)
+        return Response(content=body, media_type="application/json")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,22 @@
+-- Supporting indexes for the hot API queries.
+--
+-- Run once per schema (CONCURRENTLY cannot run inside a transaction, so use
+-- plain psql rather than a wrapped migration):
+--   psql -h $DB_HOST -U $DB_USER -d $DB_NAME -v schema=public -f sql/001_indexes.sql
+
+SET search_path TO :"schema";
+
+-- /queue (queue_stage): WHERE stage = ... ORDER BY created_at DESC LIMIT n
+CREATE INDEX CONCURRENTLY IF NOT EXISTS raw_parts_stage_created_at_idx
+    ON raw_parts (stage, created_at DESC);
+
+-- /queue (queue_all) and newest_created_at in /kpis
+CREATE INDEX CONCURRENTLY IF NOT EXISTS raw_parts_created_at_idx
+    ON raw_parts (created_at DESC);
+
+-- /alerts: latest row, and the "worst conveyor" window aggregate. event_time
+-- leads so the "event_time >= now() - interval" predicate is an index range;
+-- conveyor_id, source_pi and duration_sec are INCLUDEd so that range can be
+-- aggregated with an index-only scan (once the visibility map is current).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS raw_conveyor_event_time_covering_idx
+    ON raw_conveyor (event_time DESC) INCLUDE (conveyor_id, source_pi, duration_sec);
@@ -0,0 +1,44 @@
+-- Change notifications that drive API response-cache invalidation.
+--
+-- Every write to a raw_* table sends NOTIFY mes_invalidate '<table>:<txid>'; the
+-- API listens on that channel and drops the matching cached responses. The
+-- txid lets API workers sharing one Redis cache clear it only once per change.
+-- Statement-level triggers, so a bulk insert sends one notification (and
+-- Postgres folds duplicate payloads within a transaction anyway).
+--
+-- Run once per schema:
+--   psql -h $DB_HOST -U $DB_USER -d $DB_NAME -v schema=public -f sql/002_cache_invalidation.sql
+
+SET search_path TO :"schema";
+
+CREATE OR REPLACE FUNCTION mes_notify_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('mes_invalidate', TG_TABLE_NAME || ':' || txid_current());
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS raw_parts_chg ON raw_parts;
+CREATE TRIGGER raw_parts_chg AFTER INSERT OR UPDATE OR DELETE ON raw_parts
+    FOR EACH STATEMENT EXECUTE FUNCTION mes_notify_change();
+
+DROP TRIGGER IF EXISTS raw_robot_cycles_chg ON raw_robot_cycles;
+CREATE TRIGGER raw_robot_cycles_chg AFTER INSERT OR UPDATE OR DELETE ON raw_robot_cycles
+    FOR EACH STATEMENT EXECUTE FUNCTION mes_notify_change();
+
+DROP TRIGGER IF EXISTS raw_inspection_chg ON raw_inspection;
+CREATE TRIGGER raw_inspection_chg AFTER INSERT OR UPDATE OR DELETE ON raw_inspection
+    FOR EACH STATEMENT EXECUTE FUNCTION mes_notify_change();
+
+DROP TRIGGER IF EXISTS raw_conveyor_chg ON raw_conveyor;
+CREATE TRIGGER raw_conveyor_chg AFTER INSERT OR UPDATE OR DELETE ON raw_conveyor
+    FOR EACH STATEMENT EXECUTE FUNCTION mes_notify_change();
+
+DROP TRIGGER IF EXISTS raw_bin_events_chg ON raw_bin_events;
+CREATE TRIGGER raw_bin_events_chg AFTER INSERT OR UPDATE OR DELETE ON raw_bin_events
+    FOR EACH STATEMENT EXECUTE FUNCTION mes_notify_change();
+
+DROP TRIGGER IF EXISTS raw_shipments_chg ON raw_shipments;
+CREATE TRIGGER raw_shipments_chg AFTER INSERT OR UPDATE OR DELETE ON raw_shipments
+    FOR EACH STATEMENT EXECUTE FUNCTION mes_notify_change();
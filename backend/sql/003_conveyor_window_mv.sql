@@ -0,0 +1,32 @@
+-- Pre-aggregated conveyor window for /alerts ("conveyor running slow").
+--
+-- The API refreshes this view every few seconds (REFRESH ... CONCURRENTLY, which
+-- needs the unique index below) and reads the worst conveyor from it instead of
+-- re-aggregating raw_conveyor on every poll. mv_refresh_log records the last
+-- refresh so several API workers don't each redo it. The interval must match
+-- CONVEYOR_MV_WINDOW_MINUTES in app/main.py; /alerts requests with another
+-- window_minutes (or another schema) fall back to the live query.
+--
+-- Run once in the schema set as DB_SCHEMA:
+--   psql -h $DB_HOST -U $DB_USER -d $DB_NAME -v schema=public -f sql/003_conveyor_window_mv.sql
+
+SET search_path TO :"schema";
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_conveyor_window AS
+SELECT
+    conveyor_id,
+    source_pi,
+    AVG(duration_sec) AS avg_duration,
+    COUNT(*) AS n,
+    MAX(event_time) AS last_event_time
+FROM raw_conveyor
+WHERE event_time >= NOW() - interval '2 minutes'
+GROUP BY conveyor_id, source_pi;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_conveyor_window_key
+    ON mv_conveyor_window (conveyor_id, source_pi);
+
+CREATE TABLE IF NOT EXISTS mv_refresh_log (
+    view_name text PRIMARY KEY,
+    refreshed_at timestamptz NOT NULL
+);